@@ -1,67 +1,205 @@
-from sqlalchemy.orm import Session, joinedload
+import hashlib
+import time
+from typing import Optional, Tuple
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased, load_only, selectinload
 
 from . import models, schemas
 
+# Serialized /questions/ response as (version, expires_at, etag, body). It is
+# rebuilt when the version token of the questions and choices tables changes, and
+# at least every `_QUESTIONS_CACHE_TTL` seconds to catch edits made in place.
+_QUESTIONS_CACHE: Optional[Tuple[tuple, float, str, bytes]] = None
+_QUESTIONS_CACHE_TTL = 60.0
+
+# Number of questions fetched from the cursor at a time when streaming them.
+_YIELD_PER = 200
+
+# Submitted choice ids looked up per query, below SQLite's oldest host-parameter limit.
+_MAX_IN_PARAMS = 900
+
+
+def get_questions(db: Session, stream: bool = False):
+    """
+    Fetches all questions from the database. Choices are eagerly loaded by the
+    relationship's selectin strategy.
+    With `stream=True` an iterable is returned that loads the questions (and
+    their choices) in batches. Only the ORM hydration is batched; memory stays
+    bounded only if the caller handles each question and lets it go.
+    """
+    query = db.query(models.Question).order_by(models.Question.id)
+    if stream:
+        return query.yield_per(_YIELD_PER)
+    return query.all()
+
+
+def get_questions_public(db: Session):
+    """
+    Fetches all questions with only the columns the public API exposes.
+    `Choice.is_correct` is never selected, so it cannot leak into a response.
+    """
+    query = (
+        db.query(models.Question)
+        .options(
+            load_only(models.Question.id, models.Question.text),
+            selectinload(models.Question.choices).load_only(
+                models.Choice.id, models.Choice.text
+            ),
+        )
+        .order_by(models.Question.id)
+    )
+    return query.all()
+
+
+def get_questions_dict(db: Session):
+    """
+    Returns the public view of all questions as plain dicts, leaving out
+    `is_correct` without a round-trip through the Pydantic schemas.
+    """
+    return [
+        {
+            "id": q.id,
+            "text": q.text,
+            "choices": [{"id": c.id, "text": c.text} for c in q.choices],
+        }
+        for q in get_questions_public(db)
+    ]
+
 
-def get_questions(db: Session):
+def _questions_version(db: Session) -> tuple:
     """
-    Fetches all questions from the database, eagerly loading their choices.
+    Returns a cheap version token for the quiz content: the row count and highest
+    id of both the questions and the choices table. Ids are never reused, so
+    adding, removing or replacing rows changes it, even when another process
+    does so. Tables created before ids became AUTOINCREMENT may reuse ids after
+    a re-seed; there only the cache TTL catches it.
     """
-    return db.query(models.Question).options(joinedload(models.Question.choices)).all()
+    return tuple(
+        db.execute(
+            select(
+                select(func.count()).select_from(models.Question).scalar_subquery(),
+                select(func.max(models.Question.id)).scalar_subquery(),
+                select(func.count()).select_from(models.Choice).scalar_subquery(),
+                select(func.max(models.Choice.id)).scalar_subquery(),
+            )
+        ).one()
+    )
+
+
+def get_questions_payload(db: Session) -> Tuple[str, bytes]:
+    """
+    Returns the ETag and JSON body for the public question list. The list is
+    serialized again when the version token has moved since the last call, or
+    when the cached copy is older than `_QUESTIONS_CACHE_TTL`; edits that keep
+    every row in place, such as rewording a question, are only seen that way.
+    """
+    global _QUESTIONS_CACHE
+    version = _questions_version(db)
+    now = time.monotonic()
+    cache = _QUESTIONS_CACHE
+    if cache is None or cache[0] != version or cache[1] <= now:
+        body = orjson.dumps(get_questions_dict(db))
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+        cache = _QUESTIONS_CACHE = (version, now + _QUESTIONS_CACHE_TTL, etag, body)
+    return cache[2], cache[3]
+
+
+def invalidate_questions_cache():
+    """
+    Drops the cached question list so the next request re-reads the database.
+    """
+    global _QUESTIONS_CACHE
+    _QUESTIONS_CACHE = None
+
+
+def _user_choices(db: Session, choice_ids):
+    """
+    Looks up the submitted choices by primary key.
+    Returns {choice_id: (question_id, text)}; unknown ids are simply missing.
+    """
+    choice_ids = list(choice_ids)
+    found = {}
+    for i in range(0, len(choice_ids), _MAX_IN_PARAMS):
+        rows = db.execute(
+            select(
+                models.Choice.id, models.Choice.question_id, models.Choice.text
+            ).where(models.Choice.id.in_(choice_ids[i : i + _MAX_IN_PARAMS]))
+        )
+        for choice_id, question_id, text in rows:
+            found[choice_id] = (question_id, text)
+    return found
 
 
 def calculate_score(db: Session, user_answers: schemas.AnswerPayload):
     """
     Calculates the user's score and provides detailed results for each question.
+    The submitted choices are fetched by primary key, then one pass over the
+    questions resolves each correct choice through its index, so grading stays
+    linear in the size of the quiz.
+    If a question is answered more than once, the last answer counts.
+
+    The results are built with `model_construct`, skipping validation, since every
+    field comes straight from typed database columns. The submitted payload itself
+    is still fully validated by FastAPI before it gets here.
     """
-    score = 0
-    all_questions = get_questions(db)
+    answers = {answer.question_id: answer.choice_id for answer in user_answers.answers}
+    user_choices = _user_choices(db, set(answers.values())) if answers else {}
 
-    # Create a quick lookup map of user's answers {question_id: choice_id}
-    user_answers_map = {
-        answer.question_id: answer.choice_id for answer in user_answers.answers
-    }
+    # The first choice marked correct is the answer key for its question.
+    correct_ids = (
+        select(
+            models.Choice.question_id,
+            func.min(models.Choice.id).label("choice_id"),
+        )
+        .where(models.Choice.is_correct.is_(True))
+        .group_by(models.Choice.question_id)
+        .subquery()
+    )
+    correct_choice = aliased(models.Choice)
 
-    # Create a definitive answer key from the database {question_id: correct_choice_id}
-    answer_key = {}
-    for question in all_questions:
-        for choice in question.choices:
-            if choice.is_correct:
-                answer_key[question.id] = choice.id
-                break
+    stmt = (
+        select(
+            models.Question.id,
+            models.Question.text,
+            correct_ids.c.choice_id,
+            func.coalesce(correct_choice.text, ""),
+        )
+        .outerjoin(correct_ids, correct_ids.c.question_id == models.Question.id)
+        .outerjoin(correct_choice, correct_choice.id == correct_ids.c.choice_id)
+        .order_by(models.Question.id)
+    )
 
     detailed_results = []
-    for question in all_questions:
-        question_id = question.id
-        user_choice_id = user_answers_map.get(question_id)
-        correct_choice_id = answer_key.get(question_id)
+    correct_flags = []
+    # Bind the per-row lookups to locals ahead of the loop
+    question_result = schemas.QuestionResult.model_construct
+    append = detailed_results.append
+    append_flag = correct_flags.append
+    get_answer = answers.get
+    get_choice = user_choices.get
 
-        is_correct = (user_choice_id is not None) and (
-            user_choice_id == correct_choice_id
-        )
-        if is_correct:
-            score += 1
-
-        # Find the text for user's answer and correct answer
-        user_answer_text = "Unanswered"
-        correct_answer_text = ""
-
-        for choice in question.choices:
-            if choice.id == user_choice_id:
-                user_answer_text = choice.text
-            if choice.id == correct_choice_id:
-                correct_answer_text = choice.text
-
-        detailed_results.append(
-            schemas.QuestionResult(
-                question_id=question.id,
-                question_text=question.text,
-                user_answer_text=user_answer_text,
-                correct_answer_text=correct_answer_text,
+    rows = db.execute(stmt)
+    for question_id, question_text, correct_id, correct_text in rows:
+        choice_id = get_answer(question_id)
+        user_choice = get_choice(choice_id)
+        if user_choice is not None and user_choice[0] == question_id:
+            user_text = user_choice[1]
+        else:
+            user_text = "Unanswered"
+        is_correct = choice_id is not None and choice_id == correct_id
+        append_flag(is_correct)
+        append(
+            question_result(
+                question_id=question_id,
+                question_text=question_text,
+                user_answer_text=user_text,
+                correct_answer_text=correct_text,
                 is_correct=is_correct,
             )
         )
 
-    return schemas.QuizResult(
-        score=score, total=len(all_questions), results=detailed_results
+    return schemas.QuizResult.model_construct(
+        score=sum(correct_flags), total=len(detailed_results), results=detailed_results
     )
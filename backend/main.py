@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 
 # Add CORS middleware to allow frontend to call backend
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,6 +12,9 @@ from .database import engine, get_db
 # Create all database tables on startup
 models.Base.metadata.create_all(bind=engine)
 
+# FastAPI's default response class is kept: routes with a response_model are
+# serialized straight to bytes by pydantic-core, and /questions/ returns a body
+# already encoded with orjson.
 app = FastAPI()
 
 # --- CORS (Cross-Origin Resource Sharing) ---
@@ -40,14 +43,38 @@ def read_root():
     return {"message": "Welcome to the Quiz API"}
 
 
-@app.get("/questions/", response_model=List[schemas.Question])
-def read_questions(db: Session = Depends(get_db)):
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the current ETag. The header may be
+    `*` or a comma-separated list, and weak validators (`W/"..."`) match their
+    strong counterpart, as the weak comparison of RFC 9110 requires.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+@app.get(
+    "/questions/",
+    response_model=None,
+    responses={200: {"model": List[schemas.Question]}},
+)
+def read_questions(request: Request, db: Session = Depends(get_db)):
     """
     Fetches all questions for the quiz.
-    The response model ensures the correct answers are not sent to the client.
+    Only question and choice ids and texts are sent; the correct answers never
+    reach the client.
+    The serialized list is cached and clients holding a matching ETag get a 304.
     """
-    questions = crud.get_questions(db)
-    return questions
+    etag, body = crud.get_questions_payload(db)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.post("/submit/", response_model=schemas.QuizResult)
@@ -55,6 +82,12 @@ def submit_quiz(submission: schemas.AnswerPayload, db: Session = Depends(get_db)
     """
     Receives user answers, calculates the score, and returns the detailed results.
     """
+    question_ids = [answer.question_id for answer in submission.answers]
+    if len(question_ids) != len(set(question_ids)):
+        raise HTTPException(
+            status_code=400, detail="Duplicate question_id in submission."
+        )
+
     results = crud.calculate_score(db, user_answers=submission)
     if results is None:
         raise HTTPException(status_code=400, detail="Error calculating score.")
@@ -1,24 +1,41 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from typing import List, Optional
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
 
 # This Base is specific to the models file.
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
 
 
 class Question(Base):
     __tablename__ = "questions"
+    # Never reuse ids, so a re-seed always moves the cached question list's
+    # version token (see crud._questions_version).
+    __table_args__ = {"sqlite_autoincrement": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    text = Column(String, index=True)
-    choices = relationship("Choice", back_populates="question")
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    text: Mapped[Optional[str]]
+    # Loaded with one extra "WHERE question_id IN (...)" query per batch of
+    # questions, avoiding both N+1 lazy loads and the duplicated rows of a JOIN.
+    # Ordered by id so the correct choice's position never follows from the
+    # (question_id, is_correct) index the database may scan.
+    choices: Mapped[List["Choice"]] = relationship(
+        back_populates="question", lazy="selectin", order_by="Choice.id"
+    )
 
 
 class Choice(Base):
     __tablename__ = "choices"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    text: Mapped[Optional[str]]
+    is_correct: Mapped[Optional[bool]] = mapped_column(default=False)
+    question_id: Mapped[Optional[int]] = mapped_column(ForeignKey("questions.id"))
+    question: Mapped[Optional["Question"]] = relationship(back_populates="choices")
+
 
-    id = Column(Integer, primary_key=True, index=True)
-    text = Column(String, index=True)
-    is_correct = Column(Boolean, default=False)
-    question_id = Column(Integer, ForeignKey("questions.id"))
-    question = relationship("Question", back_populates="choices")
+# Lets the database find a question's correct choice with an index seek.
+Index("ix_choices_qid_correct", Choice.question_id, Choice.is_correct)
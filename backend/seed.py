@@ -1,6 +1,7 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from . import models
+from . import crud, models
 from .database import SessionLocal, engine
 
 # Ensure tables are created
@@ -11,11 +12,11 @@ def seed_database(db: Session):
     """
     Populates the database with initial quiz questions and choices.
     This function can be called by tests or run as a standalone script.
+    The clear and the inserts share one transaction, so SQLite syncs to disk once.
     """
     # Clear existing data to prevent duplicates
     db.query(models.Choice).delete()
     db.query(models.Question).delete()
-    db.commit()
 
     questions_data = [
         {
@@ -63,19 +64,27 @@ def seed_database(db: Session):
         },
     ]
 
-    for q_data in questions_data:
-        question = models.Question(text=q_data["text"])
-        db.add(question)
-        db.flush()  # Flush to get the question ID for choices
-        for c_data in q_data["choices"]:
-            choice = models.Choice(
-                text=c_data["text"],
-                is_correct=c_data["is_correct"],
-                question_id=question.id,
-            )
-            db.add(choice)
+    # Insert all questions in one statement, getting their IDs back in order
+    question_ids = db.scalars(
+        insert(models.Question).returning(
+            models.Question.id, sort_by_parameter_order=True
+        ),
+        [{"text": q_data["text"]} for q_data in questions_data],
+    ).all()
+
+    choice_rows = [
+        {
+            "text": c_data["text"],
+            "is_correct": c_data["is_correct"],
+            "question_id": question_id,
+        }
+        for question_id, q_data in zip(question_ids, questions_data)
+        for c_data in q_data["choices"]
+    ]
+    db.bulk_insert_mappings(models.Choice, choice_rows)
 
     db.commit()
+    crud.invalidate_questions_cache()
     print("Database has been seeded with initial data.")
 
 
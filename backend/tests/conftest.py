@@ -0,0 +1,210 @@
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import backend.crud as crud
+import backend.models as models
+import backend.schemas as schemas
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _disable_pysqlite_begin(dbapi_connection, connection_record):
+    """
+    pysqlite defers BEGIN until the first write, which breaks SAVEPOINT-based
+    rollbacks; take over transaction control so the outer BEGIN is emitted eagerly.
+    """
+    dbapi_connection.isolation_level = None
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    """
+    The in-memory test database never needs durability, so skip syncing and
+    journaling work on every commit.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.executescript(
+        "PRAGMA synchronous=OFF;"
+        "PRAGMA journal_mode=MEMORY;"
+        "PRAGMA locking_mode=EXCLUSIVE;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-20000;"
+    )
+    cursor.close()
+
+
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def _create_test_engine():
+    """Build a fresh in-memory SQLite engine on a single shared connection."""
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    event.listen(engine, "connect", _disable_pysqlite_begin)
+    event.listen(engine, "connect", _tune_sqlite)
+    event.listen(engine, "begin", _emit_begin)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """
+    Create the test engine and its schema once for the whole test session.
+    The in-memory test engine is only built when a test asks for the database.
+    Under pytest-xdist every worker process gets its own in-memory database.
+    """
+    engine = _create_test_engine()
+    models.Base.metadata.create_all(bind=engine)
+    yield engine
+    models.Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def db_connection(db_engine):
+    """One connection shared by every test; see `db_session` for isolation."""
+    connection = db_engine.connect()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture(scope="function")
+def db_session(db_connection):
+    """
+    Run each test inside a transaction that is rolled back afterwards.
+    Commits made by the code under test only release a SAVEPOINT, so every test
+    starts from an empty database without re-creating the schema.
+    If a wider-scoped fixture already holds a transaction with shared data, the
+    test is nested inside it with a SAVEPOINT instead.
+    """
+    if db_connection.in_transaction():
+        transaction = db_connection.begin_nested()
+    else:
+        transaction = db_connection.begin()
+    session = TestingSessionLocal(
+        bind=db_connection, join_transaction_mode="create_savepoint"
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+
+
+@pytest.fixture(scope="class")
+def two_question_quiz(db_connection):
+    """
+    Insert two questions with a correct and a wrong choice each, once per class.
+    Returns {choice_text: (question_id, choice_id)}. The class's tests run in
+    SAVEPOINTs inside this transaction, which is rolled back after the class.
+    """
+    transaction = db_connection.begin()
+    try:
+        with TestingSessionLocal(
+            bind=db_connection, join_transaction_mode="create_savepoint"
+        ) as session:
+            questions = [
+                models.Question(text="Question 1"),
+                models.Question(text="Question 2"),
+            ]
+            session.add_all(questions)
+            session.flush()
+            choices = [
+                models.Choice(
+                    text=f"{label} {i}",
+                    is_correct=(label == "Correct"),
+                    question_id=q.id,
+                )
+                for i, q in enumerate(questions, start=1)
+                for label in ("Correct", "Wrong")
+            ]
+            session.add_all(choices)
+            session.flush()
+            quiz = {c.text: (c.question_id, c.id) for c in choices}
+            session.commit()
+        yield quiz
+    finally:
+        transaction.rollback()
+
+
+@pytest.fixture(scope="session")
+def seeded_template():
+    """
+    Seed a template database once per session and return its sqlite3 connection.
+    Tests never use it directly; `seeded_db_session` copies it for each test.
+    """
+    import backend.seed as seed
+
+    engine = _create_test_engine()
+    models.Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal(bind=engine) as session:
+        seed.seed_database(session)
+    connection = engine.raw_connection()
+    try:
+        yield connection.driver_connection
+    finally:
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def seeded_db_session(seeded_template):
+    """
+    Give each test its own copy of the seeded database.
+    The template's pages are copied with sqlite3's backup API into a fresh
+    in-memory database, which is much cheaper than re-running the seed inserts.
+    The copy is thrown away afterwards, so tests may commit freely.
+    """
+    engine = _create_test_engine()
+    connection = engine.raw_connection()
+    try:
+        seeded_template.backup(connection.driver_connection)
+    finally:
+        connection.close()
+    # The cached question list may come from another test's database
+    crud.invalidate_questions_cache()
+    session = TestingSessionLocal(bind=engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def adapters():
+    """
+    TypeAdapters for the schemas the validation tests exercise, keyed by class
+    name. The adapters wrap each model's existing validator; the fixture only
+    shares them between tests.
+    """
+    return {
+        cls.__name__: TypeAdapter(cls)
+        for cls in (
+            schemas.ChoiceBase,
+            schemas.ChoiceCreate,
+            schemas.QuestionCreate,
+            schemas.QuizResult,
+            schemas.AnswerPayload,
+        )
+    }
+
+
+@pytest.fixture(scope="session")
+def make_payload(adapters):
+    """Build a validated AnswerPayload from (question_id, choice_id) pairs."""
+    validate = adapters["AnswerPayload"].validate_python
+
+    def _make_payload(*pairs):
+        return validate(
+            {"answers": [{"question_id": q, "choice_id": c} for q, c in pairs]}
+        )
+
+    return _make_payload
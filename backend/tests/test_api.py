@@ -1,50 +1,63 @@
-import os
-import sys
+import contextlib
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-# Add the parent directory to the path to import backend modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
 
+import backend.crud as crud
 import backend.main as main
 import backend.models as models
-import backend.seed as seed
 from backend.database import get_db
 
-# Create a test database engine
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@contextlib.contextmanager
+def count_queries(engine):
+    """
+    Collect every SQL statement sent through the given engine, leaving out the
+    BEGIN and SAVEPOINT bookkeeping of the database fixtures.
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if not statement.startswith(("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK TO")):
+            queries.append(statement)
 
-def override_get_db():
-    """Override the database dependency for testing."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
     try:
-        db = TestingSessionLocal()
-        yield db
+        yield queries
     finally:
-        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 
+@contextlib.contextmanager
+def _client_for(session):
+    """Create a test client whose requests share the given database session."""
 
-# Override the dependency
-main.app.dependency_overrides[get_db] = override_get_db
+    def override_get_db():
+        """Override the database dependency for testing."""
+        yield session
+
+    main.app.dependency_overrides[get_db] = override_get_db
+    crud.invalidate_questions_cache()
+    try:
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    """Create a test client on an empty database."""
+    with _client_for(db_session) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client():
-    """Create a test client for each test."""
-    models.Base.metadata.create_all(bind=engine)
-    with TestClient(main.app) as test_client:
+def seeded_client(seeded_db_session):
+    """Create a test client on a copy of the seeded database."""
+    with _client_for(seeded_db_session) as test_client:
         yield test_client
-    models.Base.metadata.drop_all(bind=engine)
 
 
 class TestAPIEndpoints:
@@ -62,14 +75,15 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         assert response.json() == []
 
-    def test_get_questions_with_data(self, client):
+    def test_get_questions_with_data(self, seeded_client, seeded_db_session):
         """Test getting questions with seeded data."""
-        # Seed the database
-        db = TestingSessionLocal()
-        seed.seed_database(db)
-        db.close()
-
-        response = client.get("/questions/")
+        with count_queries(seeded_db_session.get_bind()) as queries:
+            response = seeded_client.get("/questions/")
+            # Version check, questions and one selectin query for choices, never N+1
+            assert len(queries) <= 3
+            # A cached body only costs the version check
+            seeded_client.get("/questions/")
+            assert len(queries) <= 4
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 5
@@ -86,14 +100,107 @@ class TestAPIEndpoints:
         assert "id" in first_choice
         assert "is_correct" not in first_choice
 
-    def test_submit_quiz_all_correct(self, client):
-        """Test submitting a quiz with all correct answers."""
-        # Seed the database
-        db = TestingSessionLocal()
-        seed.seed_database(db)
+    def test_get_questions_keeps_choice_order(self, seeded_client):
+        """Test that choices are returned in their original order."""
+        first_question = seeded_client.get("/questions/").json()[0]
+        assert [c["text"] for c in first_question["choices"]] == [
+            "Django",
+            "FastAPI",
+            "Flask",
+        ]
+
+    def test_get_questions_not_modified(self, seeded_client):
+        """Test that a matching If-None-Match header returns 304."""
+        response = seeded_client.get("/questions/")
+        etag = response.headers["etag"]
+
+        response = seeded_client.get("/questions/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_get_questions_not_modified_header_forms(self, seeded_client):
+        """Test that weak, listed and wildcard If-None-Match values return 304."""
+        etag = seeded_client.get("/questions/").headers["etag"]
+
+        for header in (f"W/{etag}", f'"stale", {etag}', "*"):
+            response = seeded_client.get(
+                "/questions/", headers={"If-None-Match": header}
+            )
+            assert response.status_code == 304, header
+
+        response = seeded_client.get(
+            "/questions/", headers={"If-None-Match": '"stale"'}
+        )
+        assert response.status_code == 200
+
+    def test_get_questions_sees_changes_from_elsewhere(
+        self, seeded_client, seeded_db_session
+    ):
+        """Test that rows added without invalidating the cache are still served."""
+        response = seeded_client.get("/questions/")
+
+        # Written as another process would, without touching the in-process cache
+        seeded_db_session.add(models.Question(text="Extra question"))
+        seeded_db_session.commit()
+
+        updated = seeded_client.get("/questions/")
+        assert len(updated.json()) == 6
+        assert updated.headers["etag"] != response.headers["etag"]
+
+    def test_get_questions_sees_reseed_from_elsewhere(
+        self, seeded_client, seeded_db_session
+    ):
+        """Test that replacing every row without invalidating the cache is served."""
+        response = seeded_client.get("/questions/")
+
+        # Replace the quiz as a re-seed in another process would, keeping row counts
+        seeded_db_session.query(models.Choice).delete()
+        seeded_db_session.query(models.Question).delete()
+        for i in range(5):
+            question = models.Question(text=f"New question {i}")
+            question.choices = [
+                models.Choice(text=f"New choice {i}.{j}", is_correct=(j == 0))
+                for j in range(3)
+            ]
+            seeded_db_session.add(question)
+        seeded_db_session.commit()
+
+        updated = seeded_client.get("/questions/")
+        assert updated.json()[0]["text"] == "New question 0"
+        assert updated.headers["etag"] != response.headers["etag"]
+
+    def test_get_questions_cache_expires(
+        self, seeded_client, seeded_db_session, monkeypatch
+    ):
+        """Test that in-place edits are served once the cached copy expires."""
+        # Every cached copy is already expired by the next request
+        monkeypatch.setattr(crud, "_QUESTIONS_CACHE_TTL", 0)
+        seeded_client.get("/questions/")
+
+        question = seeded_db_session.query(models.Question).first()
+        question.text = "Reworded question"
+        seeded_db_session.commit()
+
+        updated = seeded_client.get("/questions/")
+        assert updated.json()[0]["text"] == "Reworded question"
+
+    def test_get_questions_etag_changes_after_reseed(self, client, db_session):
+        """Test that re-seeding invalidates the cached question list."""
+        import backend.seed as seed
+
+        response = client.get("/questions/")
+        assert response.json() == []
+
+        seed.seed_database(db_session)
+
+        reseeded = client.get("/questions/")
+        assert len(reseeded.json()) == 5
+        assert reseeded.headers["etag"] != response.headers["etag"]
 
+    def test_submit_quiz_all_correct(self, seeded_client, seeded_db_session):
+        """Test submitting a quiz with all correct answers."""
         # Get the questions to find correct answers
-        questions = db.query(models.Question).all()
+        questions = seeded_db_session.query(models.Question).all()
 
         # Create answers payload with all correct answers
         correct_answers = []
@@ -105,10 +212,11 @@ class TestAPIEndpoints:
                     )
                     break
 
-        db.close()
-
         payload = {"answers": correct_answers}
-        response = client.post("/submit/", json=payload)
+        with count_queries(seeded_db_session.get_bind()) as queries:
+            response = seeded_client.post("/submit/", json=payload)
+        # One choice lookup plus one grading query, however many questions there are
+        assert len(queries) <= 2
 
         assert response.status_code == 200
         result = response.json()
@@ -117,14 +225,10 @@ class TestAPIEndpoints:
         assert len(result["results"]) == 5
         assert all(r["is_correct"] for r in result["results"])
 
-    def test_submit_quiz_all_wrong(self, client):
+    def test_submit_quiz_all_wrong(self, seeded_client, seeded_db_session):
         """Test submitting a quiz with all wrong answers."""
-        # Seed the database
-        db = TestingSessionLocal()
-        seed.seed_database(db)
-
         # Get the questions to find wrong answers
-        questions = db.query(models.Question).all()
+        questions = seeded_db_session.query(models.Question).all()
 
         # Create answers payload with all wrong answers
         wrong_answers = []
@@ -136,10 +240,8 @@ class TestAPIEndpoints:
                     )
                     break
 
-        db.close()
-
         payload = {"answers": wrong_answers}
-        response = client.post("/submit/", json=payload)
+        response = seeded_client.post("/submit/", json=payload)
 
         assert response.status_code == 200
         result = response.json()
@@ -148,26 +250,20 @@ class TestAPIEndpoints:
         assert len(result["results"]) == 5
         assert not any(r["is_correct"] for r in result["results"])
 
-    def test_submit_quiz_partial_answers(self, client):
+    def test_submit_quiz_partial_answers(self, seeded_client, seeded_db_session):
         """Test submitting a quiz with only some questions answered."""
-        # Seed the database
-        db = TestingSessionLocal()
-        seed.seed_database(db)
-
         # Get first question and provide correct answer
-        question = db.query(models.Question).first()
+        question = seeded_db_session.query(models.Question).first()
         correct_choice = next(
             choice for choice in question.choices if choice.is_correct
         )
 
-        db.close()
-
         # Answer only the first question
         payload = {
             "answers": [{"question_id": question.id, "choice_id": correct_choice.id}]
         }
 
-        response = client.post("/submit/", json=payload)
+        response = seeded_client.post("/submit/", json=payload)
 
         assert response.status_code == 200
         result = response.json()
@@ -181,21 +277,28 @@ class TestAPIEndpoints:
         )
         assert unanswered_count == 4
 
-    def test_submit_quiz_empty_payload(self, client):
+    def test_submit_quiz_empty_payload(self, seeded_client):
         """Test submitting a quiz with empty answers."""
-        # Seed the database
-        db = TestingSessionLocal()
-        seed.seed_database(db)
-        db.close()
-
         payload = {"answers": []}
-        response = client.post("/submit/", json=payload)
+        response = seeded_client.post("/submit/", json=payload)
 
         assert response.status_code == 200
         result = response.json()
         assert result["score"] == 0
         assert result["total"] == 5
 
+    def test_submit_quiz_duplicate_question_ids(self, client):
+        """Test that answering the same question twice is rejected."""
+        payload = {
+            "answers": [
+                {"question_id": 1, "choice_id": 1},
+                {"question_id": 1, "choice_id": 2},
+            ]
+        }
+        response = client.post("/submit/", json=payload)
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Duplicate question_id in submission."}
+
     def test_submit_quiz_invalid_payload(self, client):
         """Test submitting a quiz with invalid payload structure."""
         response = client.post("/submit/", json={"invalid": "payload"})
@@ -1,39 +1,10 @@
-import os
-import sys
-
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-# Add the parent directory to the path to import backend modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import selectinload
 
 import backend.crud as crud
 import backend.models as models
 import backend.schemas as schemas
-import backend.seed as seed
-
-# Create a test database engine
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    models.Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-        models.Base.metadata.drop_all(bind=engine)
 
 
 class TestCRUD:
@@ -46,180 +17,181 @@ class TestCRUD:
 
     def test_get_questions_with_data(self, db_session):
         """Test getting questions with seeded data."""
-        # Create a sample question with choices
-        question = models.Question(text="What is Python?")
-        db_session.add(question)
-        db_session.flush()
-
-        choice1 = models.Choice(
-            text="A programming language", is_correct=True, question_id=question.id
-        )
-        choice2 = models.Choice(
-            text="A snake", is_correct=False, question_id=question.id
-        )
-        db_session.add(choice1)
-        db_session.add(choice2)
-        db_session.commit()
+        # Create a sample question with choices in one transaction
+        with db_session.begin():
+            question = models.Question(text="What is Python?")
+            db_session.add(question)
+            db_session.flush()
+            db_session.add_all(
+                [
+                    models.Choice(
+                        text="A programming language",
+                        is_correct=True,
+                        question_id=question.id,
+                    ),
+                    models.Choice(
+                        text="A snake", is_correct=False, question_id=question.id
+                    ),
+                ]
+            )
 
         questions = crud.get_questions(db_session)
         assert len(questions) == 1
         assert questions[0].text == "What is Python?"
         assert len(questions[0].choices) == 2
 
-    def test_calculate_score_all_correct(self, db_session):
-        """Test calculating score when all answers are correct."""
-        # Create test data
-        question1 = models.Question(text="Question 1")
-        question2 = models.Question(text="Question 2")
-        db_session.add_all([question1, question2])
-        db_session.flush()
-
-        # Add choices for question 1
-        choice1_correct = models.Choice(
-            text="Correct 1", is_correct=True, question_id=question1.id
-        )
-        choice1_wrong = models.Choice(
-            text="Wrong 1", is_correct=False, question_id=question1.id
-        )
-
-        # Add choices for question 2
-        choice2_correct = models.Choice(
-            text="Correct 2", is_correct=True, question_id=question2.id
-        )
-        choice2_wrong = models.Choice(
-            text="Wrong 2", is_correct=False, question_id=question2.id
-        )
-
-        db_session.add_all(
-            [choice1_correct, choice1_wrong, choice2_correct, choice2_wrong]
-        )
-        db_session.commit()
-
-        # Create user answers (all correct)
-        user_answers = schemas.AnswerPayload(
-            answers=[
-                schemas.UserAnswer(
-                    question_id=question1.id, choice_id=choice1_correct.id
-                ),
-                schemas.UserAnswer(
-                    question_id=question2.id, choice_id=choice2_correct.id
-                ),
-            ]
-        )
-
-        result = crud.calculate_score(db_session, user_answers)
-        assert result.score == 2
-        assert result.total == 2
-        assert len(result.results) == 2
-        assert all(r.is_correct for r in result.results)
-
-    def test_calculate_score_all_wrong(self, db_session):
-        """Test calculating score when all answers are wrong."""
-        # Create test data
-        question1 = models.Question(text="Question 1")
-        db_session.add(question1)
-        db_session.flush()
-
-        choice1_correct = models.Choice(
-            text="Correct 1", is_correct=True, question_id=question1.id
-        )
-        choice1_wrong = models.Choice(
-            text="Wrong 1", is_correct=False, question_id=question1.id
-        )
-        db_session.add_all([choice1_correct, choice1_wrong])
+    def test_get_questions_dict_hides_correct_answers(self, db_session):
+        """Test that the public question dicts omit is_correct."""
+        with db_session.begin():
+            question = models.Question(text="What is Python?")
+            db_session.add(question)
+            db_session.flush()
+            choice = models.Choice(
+                text="A programming language", is_correct=True, question_id=question.id
+            )
+            db_session.add(choice)
+
+        assert crud.get_questions_dict(db_session) == [
+            {
+                "id": question.id,
+                "text": "What is Python?",
+                "choices": [{"id": choice.id, "text": "A programming language"}],
+            }
+        ]
+
+    def test_get_questions_public_skips_is_correct(self, db_session):
+        """Test that the public question query never loads is_correct."""
+        with db_session.begin():
+            question = models.Question(text="What is Python?")
+            db_session.add(question)
+            db_session.flush()
+            db_session.add(
+                models.Choice(text="A snake", is_correct=False, question_id=question.id)
+            )
+        db_session.expunge_all()
+
+        questions = crud.get_questions_public(db_session)
+        choice = questions[0].choices[0]
+        assert choice.text == "A snake"
+        assert "is_correct" in inspect(choice).unloaded
+
+    def test_calculate_score_sees_new_questions(self, seeded_db_session, make_payload):
+        """Test that scoring reflects questions added after a previous submission."""
+        user_answers = make_payload()
+        assert crud.calculate_score(seeded_db_session, user_answers).total == 5
+
+        seeded_db_session.add(models.Question(text="Extra question"))
+        seeded_db_session.commit()
+
+        result = crud.calculate_score(seeded_db_session, user_answers)
+        assert result.total == 6
+        assert result.results[-1].question_text == "Extra question"
+        assert result.results[-1].correct_answer_text == ""
+
+    def test_calculate_score_sees_answer_key_changes(self, db_session, make_payload):
+        """Test that scoring always uses the current correct choice."""
+        with db_session.begin():
+            question = models.Question(text="Question 1")
+            db_session.add(question)
+            db_session.flush()
+            choice1 = models.Choice(
+                text="Choice 1", is_correct=True, question_id=question.id
+            )
+            choice2 = models.Choice(
+                text="Choice 2", is_correct=False, question_id=question.id
+            )
+            db_session.add_all([choice1, choice2])
+
+        user_answers = make_payload((question.id, choice2.id))
+        assert crud.calculate_score(db_session, user_answers).score == 0
+
+        choice1.is_correct = False
+        choice2.is_correct = True
         db_session.commit()
 
-        # Create user answers (wrong answer)
-        user_answers = schemas.AnswerPayload(
-            answers=[
-                schemas.UserAnswer(question_id=question1.id, choice_id=choice1_wrong.id)
-            ]
-        )
-
         result = crud.calculate_score(db_session, user_answers)
-        assert result.score == 0
-        assert result.total == 1
-        assert len(result.results) == 1
-        assert not result.results[0].is_correct
-
-    def test_calculate_score_partial_answers(self, db_session):
-        """Test calculating score when some questions are unanswered."""
-        # Create test data
-        question1 = models.Question(text="Question 1")
-        question2 = models.Question(text="Question 2")
-        db_session.add_all([question1, question2])
-        db_session.flush()
-
-        choice1_correct = models.Choice(
-            text="Correct 1", is_correct=True, question_id=question1.id
-        )
-        choice2_correct = models.Choice(
-            text="Correct 2", is_correct=True, question_id=question2.id
-        )
-        db_session.add_all([choice1_correct, choice2_correct])
-        db_session.commit()
-
-        # Answer only one question
-        user_answers = schemas.AnswerPayload(
-            answers=[
-                schemas.UserAnswer(
-                    question_id=question1.id, choice_id=choice1_correct.id
-                )
-            ]
-        )
+        assert result.score == 1
+        assert result.results[0].correct_answer_text == "Choice 2"
+
+
+class TestCalculateScore:
+    """Test score calculation against a shared two-question quiz."""
+
+    @pytest.mark.parametrize(
+        "answers, expected_user_texts, expected_correct",
+        [
+            (["Correct 1", "Correct 2"], ["Correct 1", "Correct 2"], [True, True]),
+            (["Wrong 1", "Wrong 2"], ["Wrong 1", "Wrong 2"], [False, False]),
+            (["Correct 1"], ["Correct 1", "Unanswered"], [True, False]),
+        ],
+        ids=["all_correct", "all_wrong", "partial_answers"],
+    )
+    def test_calculate_score(
+        self,
+        two_question_quiz,
+        db_session,
+        make_payload,
+        answers,
+        expected_user_texts,
+        expected_correct,
+    ):
+        """Test calculating score for correct, wrong and unanswered questions."""
+        user_answers = make_payload(*(two_question_quiz[text] for text in answers))
 
         result = crud.calculate_score(db_session, user_answers)
-        assert result.score == 1
+        assert result.score == sum(expected_correct)
         assert result.total == 2
-        assert len(result.results) == 2
-
-        # Check that unanswered question shows "Unanswered"
-        unanswered_result = next(
-            r for r in result.results if r.question_id == question2.id
-        )
-        assert unanswered_result.user_answer_text == "Unanswered"
-        assert not unanswered_result.is_correct
+        assert [r.user_answer_text for r in result.results] == expected_user_texts
+        assert [r.is_correct for r in result.results] == expected_correct
+        assert [r.correct_answer_text for r in result.results] == [
+            "Correct 1",
+            "Correct 2",
+        ]
 
 
 class TestSchemas:
     """Test Pydantic schemas for validation."""
 
-    def test_choice_base_schema(self):
+    def test_choice_base_schema(self, adapters):
         """Test ChoiceBase schema validation."""
-        choice = schemas.ChoiceBase(text="Test choice")
+        choice = adapters["ChoiceBase"].validate_python({"text": "Test choice"})
         assert choice.text == "Test choice"
 
-    def test_choice_create_schema(self):
+    def test_choice_create_schema(self, adapters):
         """Test ChoiceCreate schema validation."""
-        choice = schemas.ChoiceCreate(text="Test choice", is_correct=True)
+        choice = adapters["ChoiceCreate"].validate_python(
+            {"text": "Test choice", "is_correct": True}
+        )
         assert choice.text == "Test choice"
         assert choice.is_correct is True
 
-    def test_question_create_schema(self):
+    def test_question_create_schema(self, adapters):
         """Test QuestionCreate schema validation."""
-        question = schemas.QuestionCreate(text="What is 2+2?")
+        question = adapters["QuestionCreate"].validate_python({"text": "What is 2+2?"})
         assert question.text == "What is 2+2?"
 
     def test_user_answer_schema(self):
-        """Test UserAnswer schema validation."""
-        answer = schemas.UserAnswer(question_id=1, choice_id=2)
+        """Test UserAnswer schema fields."""
+        answer = schemas.UserAnswer.model_construct(question_id=1, choice_id=2)
         assert answer.question_id == 1
         assert answer.choice_id == 2
 
-    def test_answer_payload_schema(self):
+    def test_answer_payload_schema(self, adapters):
         """Test AnswerPayload schema validation."""
-        payload = schemas.AnswerPayload(
-            answers=[
-                schemas.UserAnswer(question_id=1, choice_id=2),
-                schemas.UserAnswer(question_id=2, choice_id=3),
-            ]
+        payload = adapters["AnswerPayload"].validate_python(
+            {
+                "answers": [
+                    {"question_id": 1, "choice_id": 2},
+                    {"question_id": 2, "choice_id": 3},
+                ]
+            }
         )
         assert len(payload.answers) == 2
         assert payload.answers[0].question_id == 1
 
     def test_question_result_schema(self):
-        """Test QuestionResult schema validation."""
-        result = schemas.QuestionResult(
+        """Test QuestionResult schema fields."""
+        result = schemas.QuestionResult.model_construct(
             question_id=1,
             question_text="What is Python?",
             user_answer_text="A programming language",
@@ -229,16 +201,18 @@ class TestSchemas:
         assert result.question_id == 1
         assert result.is_correct is True
 
-    def test_quiz_result_schema(self):
+    def test_quiz_result_schema(self, adapters):
         """Test QuizResult schema validation."""
-        question_result = schemas.QuestionResult(
-            question_id=1,
-            question_text="Test",
-            user_answer_text="Answer",
-            correct_answer_text="Answer",
-            is_correct=True,
+        question_result = {
+            "question_id": 1,
+            "question_text": "Test",
+            "user_answer_text": "Answer",
+            "correct_answer_text": "Answer",
+            "is_correct": True,
+        }
+        quiz_result = adapters["QuizResult"].validate_python(
+            {"score": 1, "total": 1, "results": [question_result]}
         )
-        quiz_result = schemas.QuizResult(score=1, total=1, results=[question_result])
         assert quiz_result.score == 1
         assert quiz_result.total == 1
         assert len(quiz_result.results) == 1
@@ -275,34 +249,35 @@ class TestModels:
 
     def test_question_choice_relationship(self, db_session):
         """Test the relationship between Question and Choice models."""
-        question = models.Question(text="Test question")
-        db_session.add(question)
-        db_session.flush()
-
-        choice1 = models.Choice(
-            text="Choice 1", is_correct=True, question_id=question.id
-        )
-        choice2 = models.Choice(
-            text="Choice 2", is_correct=False, question_id=question.id
-        )
-        db_session.add_all([choice1, choice2])
-        db_session.commit()
-
-        # Test the relationship
-        db_session.refresh(question)
+        with db_session.begin():
+            question = models.Question(text="Test question")
+            db_session.add(question)
+            db_session.flush()
+            choice1 = models.Choice(
+                text="Choice 1", is_correct=True, question_id=question.id
+            )
+            choice2 = models.Choice(
+                text="Choice 2", is_correct=False, question_id=question.id
+            )
+            db_session.add_all([choice1, choice2])
+
+        # Load the question and its choices in one batched round-trip
+        question = db_session.execute(
+            select(models.Question)
+            .options(selectinload(models.Question.choices))
+            .where(models.Question.id == question.id)
+        ).scalar_one()
         assert len(question.choices) == 2
-        assert choice1 in question.choices
-        assert choice2 in question.choices
+        # The identity map hands back the very objects that were added
+        assert {id(c) for c in question.choices} == {id(choice1), id(choice2)}
 
 
 class TestSeedData:
     """Test the seed functionality."""
 
-    def test_seed_database_creates_questions(self, db_session):
+    def test_seed_database_creates_questions(self, seeded_db_session):
         """Test that seeding creates the expected questions."""
-        seed.seed_database(db_session)
-
-        questions = crud.get_questions(db_session)
+        questions = crud.get_questions(seeded_db_session)
         assert len(questions) == 5  # Based on the seed data
 
         # Check first question
@@ -311,15 +286,19 @@ class TestSeedData:
         assert len(first_question.choices) == 3
 
         # Check that FastAPI is mentioned in one of the choices
-        fastapi_choice = next(
-            (choice for choice in first_question.choices if "FastAPI" in choice.text),
-            None,
-        )
+        fastapi_choice = seeded_db_session.execute(
+            select(models.Choice).where(
+                models.Choice.question_id == first_question.id,
+                models.Choice.text.contains("FastAPI"),
+            )
+        ).scalar_one_or_none()
         assert fastapi_choice is not None
         assert fastapi_choice.is_correct
 
     def test_seed_database_clears_existing_data(self, db_session):
         """Test that seeding clears existing data before adding new data."""
+        import backend.seed as seed
+
         # Add some initial data
         question = models.Question(text="Initial question")
         db_session.add(question)